@@ -70,6 +70,8 @@ class TokSequence:
     * tokens (list of str): tokens as sequence of strings.
     * ids (list of int), these are the one to be fed to models.
     * events (list of Event): Event objects that can carry time or other information useful for debugging.
+      Tokenizers creating their tokens directly as ids (:class:`miditok.CPWord`) leave it to ``None``,
+      unless their configuration has the ``create_events=True`` additional parameter.
     * bytes (str): ids are converted into unique bytes, all joined together in a single string.
 
     Bytes are used internally by MidiTok for Byte Pair Encoding.
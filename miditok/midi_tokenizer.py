@@ -7,6 +7,7 @@ from pathlib import Path
 import json
 import warnings
 from copy import deepcopy
+from functools import wraps
 from typing import List, Tuple, Dict, Union, Callable, Iterable, Optional, Any, Sequence
 
 import numpy as np
@@ -132,6 +133,7 @@ def _in_as_seq(complete: bool = True, decode_bpe: bool = True):
     """
 
     def decorator(function: Callable = None):
+        @wraps(function)
         def wrapper(*args, **kwargs):
             tokenizer = args[0]
             seq = args[1]
@@ -161,6 +163,7 @@ def _in_as_seq(complete: bool = True, decode_bpe: bool = True):
 def _out_as_complete_seq(function: Callable):
     r"""Decorator completing an output :class:`miditok.TokSequence` object."""
 
+    @wraps(function)
     def wrapper(*args, **kwargs):
         self = args[0]
         res = function(*args, **kwargs)
@@ -631,27 +634,53 @@ class MIDITokenizer(ABC, HFHubMixin):
                         0, Event("Program", track.program, 0, desc="ProgramNoteOff")
                     )
                 all_events[ti] += track_events
-                all_events[ti].sort(key=lambda x: (x.time, self.__order(x)))
+                all_events[ti] = self.__sort_events(all_events[ti])
         if self.one_token_stream:
-            all_events.sort(key=lambda x: (x.time, self.__order(x)))
+            all_events = self.__sort_events(all_events)
             # Add ProgramChange (named Program) tokens if requested
             if self.config.program_changes:
                 self._add_program_change_events(all_events)
 
         # Add time events
+        # Tokenizers can directly return token ids (as an array) instead of events (e.g. CPWord)
         if self.one_token_stream:
             all_events = self._add_time_events(all_events)
-            tok_sequence = TokSequence(events=all_events)
+            if isinstance(all_events, np.ndarray):
+                tok_sequence = TokSequence(ids=all_events.tolist())
+            else:
+                tok_sequence = TokSequence(events=all_events)
             self.complete_sequence(tok_sequence)
         else:
             tok_sequence = []
             for i in range(len(all_events)):
                 all_events[i] = self._add_time_events(all_events[i])
-                tok_sequence.append(TokSequence(events=all_events[i]))
+                if isinstance(all_events[i], np.ndarray):
+                    tok_sequence.append(TokSequence(ids=all_events[i].tolist()))
+                else:
+                    tok_sequence.append(TokSequence(events=all_events[i]))
                 self.complete_sequence(tok_sequence[-1])
 
         return tok_sequence
 
+    @staticmethod
+    def __sort_events(events: List[Event]) -> List[Event]:
+        r"""Sorts events by time, and events occurring at the same time by their type
+        order (see `__order`). The sort is stable, and done with numpy on the arrays of
+        times and orders of the events.
+
+        :param events: events to sort.
+        :return: the sorted events.
+        """
+        times = np.fromiter(
+            (event.time for event in events), dtype=np.int64, count=len(events)
+        )
+        orders = np.fromiter(
+            (MIDITokenizer.__order(event) for event in events),
+            dtype=np.int64,
+            count=len(events),
+        )
+        return [events[i] for i in np.lexsort((orders, times))]
+
     @staticmethod
     def __order(event: Event) -> int:
         # Global MIDI tokens first
@@ -878,7 +907,17 @@ class MIDITokenizer(ABC, HFHubMixin):
 
         return events
 
-    def _add_time_events(self, events: List[Event]) -> List[Event]:
+    def _add_time_events(self, events: List[Event]) -> Union[List[Event], np.ndarray]:
+        r"""Takes a sequence of note events (containing optionally Chord, Tempo and
+        TimeSignature tokens), and insert (not inplace) time tokens (TimeShift, Rest...)
+        to complete the sequence.
+        The events can also be directly returned as an array of token ids (e.g.
+        :class:`miditok.CPWord`), in which case the ``events`` attribute of the
+        :class:`miditok.TokSequence` is not set.
+
+        :param events: note events to complete.
+        :return: the same events, with time events inserted, or the array of their ids.
+        """
         raise NotImplementedError
 
     def midi_to_tokens(
@@ -1442,14 +1481,20 @@ class MIDITokenizer(ABC, HFHubMixin):
         return np.linspace(*self.config.pitch_bend_range, dtype=np.int32)
 
     @staticmethod
-    def _compute_ticks_per_bar(time_sig: TimeSignature, time_division: int):
+    def _compute_ticks_per_bar(
+        time_sig: Union[TimeSignature, Tuple[int, int]], time_division: int
+    ):
         r"""Computes time resolution of one bar in ticks.
 
-        :param time_sig: time signature object
+        :param time_sig: time signature object, or tuple of its numerator and denominator
         :param time_division: MIDI time division / resolution, in ticks/beat (of the MIDI being parsed)
         :return: MIDI bar resolution, in ticks/bar
         """
-        return int(time_division * 4 * time_sig.numerator / time_sig.denominator)
+        if isinstance(time_sig, TimeSignature):
+            numerator, denominator = time_sig.numerator, time_sig.denominator
+        else:
+            numerator, denominator = time_sig
+        return int(time_division * 4 * numerator / denominator)
 
     @staticmethod
     def _parse_token_time_signature(token_time_sig: str) -> Tuple[int, int]:
@@ -1918,13 +1963,15 @@ class MIDITokenizer(ABC, HFHubMixin):
         previous_type = tokens[0].split("_")[0]
         current_pos = -1
         current_program = 0
-        current_pitches = {p: [] for p in self.config.programs}
+        # Pitches played at the current position, as one int bitmask per program played,
+        # cleared in place on resets
+        current_pitches = {}
         note_tokens_types = ["Pitch", "NoteOn"]
 
         # Init first note and current pitches if needed
         if previous_type in note_tokens_types:
             pitch_val = int(tokens[0].split("_")[1])
-            current_pitches[current_program].append(pitch_val)
+            current_pitches[current_program] = 1 << pitch_val
         elif previous_type == "Position":
             current_pos = int(tokens[0].split("_")[1])
 
@@ -1936,15 +1983,16 @@ class MIDITokenizer(ABC, HFHubMixin):
             if event_type in self.tokens_types_graph[previous_type]:
                 if event_type == "Bar":  # reset
                     current_pos = -1
-                    current_pitches = {p: [] for p in self.config.programs}
+                    current_pitches.clear()
                 elif event_type in ["TimeShift", "Time-Shift", "Rest"]:
-                    current_pitches = {p: [] for p in self.config.programs}
+                    current_pitches.clear()
                 elif event_type in note_tokens_types:
-                    pitch_val = int(event_value)
-                    if pitch_val in current_pitches[current_program]:
+                    pitch_bit = 1 << int(event_value)
+                    played_pitches = current_pitches.get(current_program, 0)
+                    if played_pitches & pitch_bit:
                         err_note += 1  # pitch already played at current position
                     else:
-                        current_pitches[current_program].append(pitch_val)
+                        current_pitches[current_program] = played_pitches | pitch_bit
                 elif event_type == "Position":
                     # With time signatures, it can happen that Rest -> TimeSig -> Position
                     if (
@@ -1957,7 +2005,7 @@ class MIDITokenizer(ABC, HFHubMixin):
                     ):
                         err_time += 1  # token position value <= to the current position
                     current_pos = int(event_value)
-                    current_pitches = {p: [] for p in self.config.programs}
+                    current_pitches.clear()
                 elif event_type == "Program":  # reset
                     current_program = int(event_value)
             # Bad token type
@@ -1,5 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
 from math import ceil
-from typing import List, Tuple, Dict, Optional, Union, Any
+from typing import List, Tuple, Dict, Optional, Union, Any, Callable
 from pathlib import Path
 import warnings
 
@@ -7,9 +8,42 @@ import numpy as np
 from miditoolkit import MidiFile, Instrument, Note, TempoChange, TimeSignature
 
 from ..midi_tokenizer import MIDITokenizer, _in_as_seq
-from ..classes import TokSequence, Event
+from ..classes import TokSequence, Event, TokenizerConfig
 from ..constants import TIME_DIVISION, TEMPO, MIDI_INSTRUMENTS, TIME_SIGNATURE
 
+try:
+    from numba import njit
+
+    _NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional, the decoding loop will then run in pure Python
+    _NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+# Integer codes of the event types, used by CPWord._add_time_events to compare types as
+# integers. The first five codes are the types of the events of notes.
+_PITCH, _VELOCITY, _DURATION, _PITCH_BEND, _PEDAL = range(5)
+_PROGRAM, _CHORD, _TEMPO, _TIME_SIG, _OTHER = range(5, 10)
+_EVENT_TYPE_CODES = {
+    "Pitch": _PITCH,
+    "Velocity": _VELOCITY,
+    "Duration": _DURATION,
+    "PitchBend": _PITCH_BEND,
+    "Pedal": _PEDAL,
+    "Program": _PROGRAM,
+    "Chord": _CHORD,
+    "Tempo": _TEMPO,
+    "TimeSig": _TIME_SIG,
+}
+# Integer value of the tokens without value (Ignore_None, Bar_None...), -1 being a program
+_NO_VALUE = -(2**15)
+# Actions of CPWord.tokens_errors for each token types succession, see
+# CPWord._create_token_types_succession_matrix
+_BAD_TYPE, _GOOD_TYPE, _RESET_BAR = range(3)
+_CHECK_PITCH, _CHECK_POSITION, _SET_POSITION = range(3, 6)
+
 
 class CPWord(MIDITokenizer):
     r"""Introduced with the
@@ -35,8 +69,28 @@ class CPWord(MIDITokenizer):
     very delicate. Hence, we do not recommend this tokenization for generation with small models.
     **Note:** When decoding multiple token sequences (of multiple tracks), i.e. when `config.use_programs` is False,
     only the tempos and time signatures of the first sequence will be decoded for the whole MIDI.
+    **Note:** The compound tokens are directly created as ids, hence the ``events`` attribute of the
+    :class:`miditok.TokSequence` objects created by this tokenizer is ``None``. You can create
+    the tokenizer with the ``create_events=True`` additional parameter of its configuration
+    (``TokenizerConfig(create_events=True)``) to also create the compound tokens as lists of
+    :class:`miditok.Event` objects, with their times, at the cost of a slower tokenization.
+    **Note:** The decoding and analysis (``tokens_errors``) of the tokens are compiled with
+    `Numba <https://numba.pydata.org>`_ if it is installed (``pip install miditok[numba]``).
+
+    :param tokenizer_config: the tokenizer's configuration, as a :class:`miditok.classes.TokenizerConfig` object.
+    :param params: path to a tokenizer config file. This will override other arguments and
+            load the tokenizer based on the config file. (default: None)
     """
 
+    def __init__(
+        self,
+        tokenizer_config: TokenizerConfig = None,
+        params: Union[str, Path] = None,
+    ):
+        super().__init__(tokenizer_config, params)
+        self._create_cp_lookup_tables()
+        self._create_token_types_succession_matrix()
+
     def _tweak_config_before_creating_voc(self):
         if self.config.use_time_signatures and self.config.use_rests:
             # NOTE: this configuration could work by adding a Bar token with the new TimeSig after the Rest, but the
@@ -54,6 +108,8 @@ class CPWord(MIDITokenizer):
         self.config.use_sustain_pedals = False
         self.config.use_pitch_bends = False
         self.config.program_changes = False
+        if "create_events" not in self.config.additional_params:
+            self.config.additional_params["create_events"] = False
         token_types = ["Family", "Position", "Pitch", "Velocity", "Duration"]
         for add_tok_attr, add_token in [
             ("use_programs", "Program"),
@@ -68,110 +124,366 @@ class CPWord(MIDITokenizer):
             type_: idx for idx, type_ in enumerate(token_types)
         }  # used for data augmentation
         self.vocab_types_idx["Bar"] = 1  # same as position
+        self._cp_slot_count = len(token_types)
 
-    def _add_time_events(self, events: List[Event]) -> List[List[Event]]:
+    def _create_cp_lookup_tables(self):
+        r"""Creates the lookup tables linking token values to their ids in the vocabularies.
+        They allow to create compound tokens directly as rows of ids, without creating
+        intermediate :class:`miditok.Event` objects nor formatting strings.
+        This method is called at ``__init__``, once the vocabularies are created.
+        """
+        # Default compound token: Family_Metric followed by Ignore_None tokens
+        self._ignore_row = np.array(
+            [self.vocab[0]["Family_Metric"]]
+            + [self.vocab[i]["Ignore_None"] for i in range(1, self._cp_slot_count)],
+            dtype=np.int16,
+        )
+        self._ignore_row.flags.writeable = False
+        self._family_note_id = self.vocab[0]["Family_Note"]
+        self._bar_id = self.vocab[1]["Bar_None"]
+        # Position and Pitch tokens are added in ascending order, hence have successive ids
+        self._position_base_id = self.vocab[1]["Position_0"]
+        self._pitch_base_id = self.vocab[2][f"Pitch_{self.config.pitch_range[0]}"]
+        self._pitch_offset_id = self._pitch_base_id - self.config.pitch_range[0]
+        # Indexes of the optional token types in compound tokens, None if not used
+        self._program_slot = self.vocab_types_idx.get("Program")
+        self._chord_slot = self.vocab_types_idx.get("Chord")
+        self._rest_slot = self.vocab_types_idx.get("Rest")
+        self._tempo_slot = self.vocab_types_idx.get("Tempo")
+        self._time_sig_slot = self.vocab_types_idx.get("TimeSig")
+        self._velocity_ids = {
+            int(vel): self.vocab[3][f"Velocity_{vel}"] for vel in self.velocities
+        }
+        self._duration_ids = {
+            ".".join(map(str, dur)): self.vocab[4][
+                f'Duration_{".".join(map(str, dur))}'
+            ]
+            for dur in self.durations
+        }
+        if self.config.use_programs:
+            self._program_ids = {
+                program: self.vocab[self.vocab_types_idx["Program"]][
+                    f"Program_{program}"
+                ]
+                for program in self.config.programs
+            }
+        if self.config.use_chords:
+            self._chord_ids = {
+                token.split("_")[1]: id_
+                for token, id_ in self.vocab[self.vocab_types_idx["Chord"]].items()
+                if token.split("_")[0] == "Chord"
+            }
+        if self.config.use_rests:
+            self._rest_ids = {
+                rest: self.vocab[self.vocab_types_idx["Rest"]][
+                    f'Rest_{".".join(map(str, rest))}'
+                ]
+                for rest in self.rests
+            }
+        if self.config.use_tempos:
+            self._tempo_ids = {
+                float(tempo): self.vocab[self.vocab_types_idx["Tempo"]][
+                    f"Tempo_{tempo}"
+                ]
+                for tempo in self.tempos
+            }
+        if self.config.log_tempos:
+            # pick the closest to the default value
+            self._default_tempo = float(
+                self.tempos[(np.abs(self.tempos - TEMPO)).argmin()]
+            )
+        else:
+            self._default_tempo = TEMPO
+        if self.config.use_time_signatures:
+            self._time_signature_ids = {
+                f"{num}/{den}": self.vocab[self.vocab_types_idx["TimeSig"]][
+                    f"TimeSig_{num}/{den}"
+                ]
+                for num, den in self.time_signatures
+            }
+            self._time_signature_tuples = {
+                f"{num}/{den}": (num, den) for num, den in self.time_signatures
+            }
+
+        # Values of the tokens indexed by their ids, to decode compound tokens without parsing
+        # strings. Tokens without value (special tokens, Ignore_None, Bar_None) are set to None.
+        # The types and values of all the tokens of a vocabulary are split in a single pass.
+        def token_values(vocab_idx: int, token_type: str, parse: Callable) -> List:
+            tokens = np.array(list(self.vocab[vocab_idx].keys()))
+            ids = np.array(list(self.vocab[vocab_idx].values()))
+            types_values = np.char.partition(tokens, "_")[:, [0, 2]]
+            mask = types_values[:, 0] == token_type
+            values = [None] * len(tokens)
+            for id_, value in zip(
+                ids[mask].tolist(), map(parse, types_values[mask, 1].tolist())
+            ):
+                values[id_] = value
+            return values
+
+        def parse_duration(value: str) -> Tuple[int, int, int]:
+            return tuple(map(int, value.split(".")))
+
+        def lut_values(values: List) -> List[int]:
+            return [_NO_VALUE if value is None else value for value in values]
+
+        self._family_metric_id = self.vocab[0]["Family_Metric"]
+        self._position_values = token_values(1, "Position", int)
+        self._pitch_values = token_values(2, "Pitch", int)
+        self._velocity_values = token_values(3, "Velocity", int)
+        self._duration_values = token_values(4, "Duration", parse_duration)
+        if self.config.use_programs:
+            self._program_values = token_values(
+                self.vocab_types_idx["Program"], "Program", int
+            )
+        if self.config.use_rests:
+            self._rest_values = token_values(
+                self.vocab_types_idx["Rest"], "Rest", parse_duration
+            )
+        if self.config.use_tempos:
+            self._tempo_values = token_values(
+                self.vocab_types_idx["Tempo"], "Tempo", float
+            )
+        if self.config.use_time_signatures:
+            self._time_signature_values = token_values(
+                self.vocab_types_idx["TimeSig"],
+                "TimeSig",
+                self._parse_token_time_signature,
+            )
+        # Integer values of the Position, Pitch and Program tokens indexed by ids, to analyze
+        # compound tokens (tokens_errors). Tokens without value are set to _NO_VALUE.
+        self._position_ints = np.array(
+            lut_values(self._position_values), dtype=np.int16
+        )
+        self._pitch_ints = np.array(lut_values(self._pitch_values), dtype=np.int16)
+        # Sizes of the vocabularies, to check the ids before indexing the tables with them
+        self._vocab_sizes = np.array([len(vocab) for vocab in self.vocab])
+        # Number of pitch values of the masks of played pitches of tokens_errors
+        self._nb_pitch_values = max(128, int(self._pitch_ints.max()) + 1)
+        self._program_ints = np.array(
+            lut_values(self._program_values) if self.config.use_programs else [],
+            dtype=np.int16,
+        )
+        # Indexes of the programs in the masks of played pitches of tokens_errors
+        self._program_to_idx = {
+            program: i for i, program in enumerate(self.config.programs)
+        }
+        # Rows of the Program tokens in these masks indexed by ids, -1 for tokens without value.
+        # Without programs, all the notes are in a single row.
+        self._program_rows = np.array(
+            [self._program_to_idx.get(p, -1) for p in self._program_ints.tolist()],
+            dtype=np.int16,
+        )
+        self._nb_program_rows = (
+            len(self._program_to_idx) if self.config.use_programs else 1
+        )
+        # Decoding lookup tables, for each time division seen (see _cp_decoding_tables)
+        self._cp_decoding_luts = {}
+
+    def _cp_decoding_tables(self, time_division: int) -> Tuple:
+        r"""Returns the lookup tables used by :func:`_decode_cp_tokens` to decode compound
+        tokens, mapping the ids of each vocabulary to integer values.
+        Durations, rests and bar lengths of time signatures are given in ticks for the given
+        time division. Tokens without value are mapped to -1 (position) or 0. Tempos are
+        decoded from their ids only, hence have no table.
+        They are returned as NumPy arrays if numba is installed, as lists otherwise as
+        indexing lists is faster in pure Python.
+        The tables are computed once per time division, and kept in memory.
+
+        :param time_division: MIDI time division / resolution, in ticks/beat (of the MIDI to create).
+        :return: the lookup tables (ignore ids, positions, pitches, velocities, durations, programs,
+            rests, and time signatures as (numerator, denominator, ticks per bar)).
+        """
+        if time_division in self._cp_decoding_luts:
+            return self._cp_decoding_luts[time_division]
+
+        def lut(values: List, default, map_: Callable = None) -> List:
+            return [
+                default if value is None else (value if map_ is None else map_(value))
+                for value in values
+            ]
+
+        def duration_ticks(duration: Tuple[int, int, int]) -> int:
+            return self._token_duration_to_ticks(duration, time_division)
+
+        def time_sig_ticks(time_sig: Tuple[int, int]) -> Tuple[int, int, int]:
+            return (
+                *time_sig,
+                self._compute_ticks_per_bar(time_sig, time_division),
+            )
+
+        tables = [
+            self._ignore_row.tolist(),
+            lut(self._position_values, -1),
+            lut(self._pitch_values, 0),
+            lut(self._velocity_values, 0),
+            lut(self._duration_values, 0, duration_ticks),
+            lut(self._program_values, 0) if self.config.use_programs else [0],
+            lut(self._rest_values, 0, duration_ticks) if self.config.use_rests else [0],
+            lut(self._time_signature_values, (0, 0, 0), time_sig_ticks)
+            if self.config.use_time_signatures
+            else [(0, 0, 0)],
+        ]
+        if _NUMBA_AVAILABLE:
+            tables = [np.array(table, dtype=np.int64) for table in tables]
+        self._cp_decoding_luts[time_division] = tuple(tables)
+        return self._cp_decoding_luts[time_division]
+
+    def _add_time_events(
+        self, events: List[Event]
+    ) -> Union[np.ndarray, List[List[Event]]]:
         r"""
         Takes a sequence of note events (containing optionally Chord, Tempo and TimeSignature tokens),
         and insert (not inplace) time tokens (TimeShift, Rest) to complete the sequence.
+        The compound tokens are directly created as ids, each row of the returned array being a
+        compound token. If the ``create_events`` additional parameter of the configuration is
+        True, they are then converted to lists of Event objects.
 
         :param events: note events to complete.
-        :return: the same events, with time events inserted.
+        :return: the compound tokens, as an array of ids of shape (nb_tokens, nb_token_types),
+            or as lists of Event objects.
         """
         time_division = self._current_midi_metadata["time_division"]
         ticks_per_sample = time_division / max(self.config.beat_res.values())
 
+        # Compound tokens are written as rows of ids in a preallocated array, grown if needed.
+        # All its rows are initialized at once with the default compound token.
+        tokens = np.tile(self._ignore_row, (len(events) + 1, 1))
+        nb_tokens = 0
+        # Times and descriptions of the compound tokens, only kept to create Event objects
+        create_events = self.config.additional_params["create_events"]
+        tokens_times_descs = []
+
+        def new_token(time: int, desc: str = "") -> np.ndarray:
+            nonlocal tokens, nb_tokens
+            if nb_tokens == tokens.shape[0]:
+                tokens = np.concatenate(
+                    (tokens, np.tile(self._ignore_row, (tokens.shape[0], 1)))
+                )
+            if create_events:
+                tokens_times_descs.append((time, desc))
+            nb_tokens += 1
+            return tokens[nb_tokens - 1]
+
         # Add time events
-        all_events = []
         current_bar = -1
         bar_at_last_ts_change = 0
         previous_tick = -1
-        previous_note_end = 0
-        tick_at_last_ts_change = tick_at_current_bar = 0
+        tick_at_last_ts_change = 0
         current_time_sig = TIME_SIGNATURE
-        if self.config.log_tempos:
-            # pick the closest to the default value
-            current_tempo = float(self.tempos[(np.abs(self.tempos - TEMPO)).argmin()])
-        else:
-            current_tempo = TEMPO
+        current_tempo = self._default_tempo
         current_program = None
-        ticks_per_bar = self._compute_ticks_per_bar(
-            TimeSignature(*current_time_sig, 0), time_division
+        ticks_per_bar = self._compute_ticks_per_bar(current_time_sig, time_division)
+        types = [_EVENT_TYPE_CODES.get(event.type, _OTHER) for event in events]
+
+        # Look for the first TimeSig and Tempo tokens, if any is given before the first note,
+        # to update current_time_sig and current_tempo
+        look_for_time_sig = self.config.use_time_signatures
+        look_for_tempo = self.config.use_tempos
+        for event, type_ in zip(events, types):
+            if not (look_for_time_sig or look_for_tempo):
+                break
+            if type_ == _TIME_SIG and look_for_time_sig:
+                current_time_sig = self._time_signature_tuples[event.value]
+                ticks_per_bar = self._compute_ticks_per_bar(
+                    current_time_sig, time_division
+                )
+                look_for_time_sig = False
+            elif type_ == _TEMPO and look_for_tempo:
+                current_tempo = event.value
+                look_for_tempo = False
+            elif type_ < _PROGRAM:  # note event
+                break
+
+        # Compute the bar and position of all the events at once. Time signature changes split
+        # the events in segments with constant ticks per bar, an event of type TimeSig
+        # belonging to the segment preceding it.
+        times = np.fromiter(
+            (event.time for event in events), dtype=np.int64, count=len(events)
         )
-        # First look for a TimeSig token, if any is given at tick 0, to update current_time_sig
-        if self.config.use_time_signatures:
-            for event in events:
-                if event.type == "TimeSig":
-                    current_time_sig = list(map(int, event.value.split("/")))
-                    ticks_per_bar = self._compute_ticks_per_bar(
-                        TimeSignature(*current_time_sig, event.time), time_division
-                    )
-                    break
-                elif event.type in [
-                    "Pitch",
-                    "Velocity",
-                    "Duration",
-                    "PitchBend",
-                    "Pedal",
-                ]:
-                    break
-        # Then look for a Tempo token, if any is given at tick 0, to update current_tempo
-        if self.config.use_tempos:
-            for event in events:
-                if event.type == "Tempo":
-                    current_tempo = event.value
-                    break
-                elif event.type in [
-                    "Pitch",
-                    "Velocity",
-                    "Duration",
-                    "PitchBend",
-                    "Pedal",
-                ]:
-                    break
+        types_arr = np.array(types, dtype=np.int8)
+        ts_indexes = np.flatnonzero(types_arr == _TIME_SIG).tolist()
+        seg_tick, seg_bar, seg_ticks_per_bar = [0], [0], [ticks_per_bar]
+        for e in ts_indexes:
+            seg_bar.append(
+                seg_bar[-1] + (events[e].time - seg_tick[-1]) // seg_ticks_per_bar[-1]
+            )
+            seg_tick.append(events[e].time)
+            seg_ticks_per_bar.append(
+                self._compute_ticks_per_bar(
+                    self._time_signature_tuples[events[e].value],
+                    time_division,
+                )
+            )
+        segments = np.searchsorted(ts_indexes, np.arange(len(events)), side="left")
+        seg_tick = np.array(seg_tick, dtype=np.int64)[segments]
+        seg_bar = np.array(seg_bar, dtype=np.int64)[segments]
+        seg_ticks_per_bar = np.array(seg_ticks_per_bar, dtype=np.int64)[segments]
+        bars = seg_bar + (times - seg_tick) // seg_ticks_per_bar
+        ticks_at_bars = seg_tick + (bars - seg_bar) * seg_ticks_per_bar
+        positions = ((times - ticks_at_bars) / ticks_per_sample).astype(np.int64)
+        bars, positions = bars.tolist(), positions.tolist()
+        seg_tick, seg_bar = seg_tick.tolist(), seg_bar.tolist()
+        seg_ticks_per_bar = seg_ticks_per_bar.tolist()
+
+        # Running maximum of the end ticks of the notes (and times of the other events) before
+        # each event, used to detect rests. Program events and notes incomplete at the end of the
+        # sequence do not count.
+        if self.config.use_rests:
+            is_pitch = types_arr == _PITCH
+            is_pitch[-2:] = False
+            descs = np.fromiter(
+                (
+                    event.desc if is_pitch_ else 0
+                    for event, is_pitch_ in zip(events, is_pitch)
+                ),
+                dtype=np.int64,
+                count=len(events),
+            )
+            events_ends = np.where(
+                is_pitch,
+                descs,
+                np.where(np.isin(types_arr, [_TEMPO, _TIME_SIG, _CHORD]), times, 0),
+            )
+            previous_notes_end = np.concatenate(
+                ([0], np.maximum.accumulate(events_ends)[:-1])
+            ).tolist()
+
         # Add the time events
-        for e, event in enumerate(events):
-            if event.type == "Tempo":
+        for e, (event, type_) in enumerate(zip(events, types)):
+            if type_ == _TEMPO:
                 current_tempo = event.value
-            elif event.type == "Program":
+            elif type_ == _PROGRAM:
                 current_program = event.value
                 continue
             if event.time != previous_tick:
                 # (Rest)
                 if (
                     self.config.use_rests
-                    and event.time - previous_note_end >= self._min_rest
+                    and event.time - previous_notes_end[e] >= self._min_rest
                 ):
-                    previous_tick = previous_note_end
+                    previous_tick = previous_notes_end[e]
                     rest_values = self._ticks_to_duration_tokens(
                         event.time - previous_tick, rest=True
                     )
                     # Add Rest events and increment previous_tick
                     for dur_value, dur_ticks in zip(*rest_values):
-                        all_events.append(
-                            self.__create_cp_token(
-                                previous_tick,
-                                rest=".".join(map(str, dur_value)),
-                                desc=f"{event.time - previous_tick} ticks",
-                            )
+                        self.__create_cp_rest_token(
+                            new_token(
+                                previous_tick, f"{event.time - previous_tick} ticks"
+                            ),
+                            dur_value,
                         )
                         previous_tick += dur_ticks
-                    # We update current_bar and tick_at_current_bar here without creating Bar tokens
+                    # We update current_bar here without creating Bar tokens
                     real_current_bar = (
                         bar_at_last_ts_change
                         + (previous_tick - tick_at_last_ts_change) // ticks_per_bar
                     )
                     if real_current_bar > current_bar:
-                        tick_at_current_bar += (
-                            real_current_bar - current_bar
-                        ) * ticks_per_bar
                         current_bar = real_current_bar
 
                 # Bar
-                nb_new_bars = (
-                    bar_at_last_ts_change
-                    + (event.time - tick_at_last_ts_change) // ticks_per_bar
-                    - current_bar
-                )
+                nb_new_bars = bars[e] - current_bar
                 if nb_new_bars >= 1:
                     if self.config.use_time_signatures:
                         time_sig_arg = f"{current_time_sig[0]}/{current_time_sig[1]}"
@@ -179,167 +491,117 @@ class CPWord(MIDITokenizer):
                         time_sig_arg = None
                     for i in range(nb_new_bars):
                         # exception when last bar and event.type == "TimeSig"
-                        if i == nb_new_bars - 1 and event.type == "TimeSig":
-                            time_sig_arg = list(map(int, event.value.split("/")))
-                            time_sig_arg = f"{time_sig_arg[0]}/{time_sig_arg[1]}"
-                        all_events.append(
-                            self.__create_cp_token(
-                                (current_bar + i + 1) * ticks_per_bar,
-                                bar=True,
-                                desc="Bar",
-                                time_signature=time_sig_arg,
-                            )
+                        if i == nb_new_bars - 1 and type_ == _TIME_SIG:
+                            time_sig_arg = event.value
+                        bar_tick = seg_tick[e] + seg_ticks_per_bar[e] * (
+                            current_bar + i + 1 - seg_bar[e]
+                        )
+                        self.__create_cp_bar_token(
+                            new_token(bar_tick, "Bar"), time_sig_arg
                         )
                     current_bar += nb_new_bars
-                    tick_at_current_bar = (
-                        tick_at_last_ts_change
-                        + (current_bar - bar_at_last_ts_change) * ticks_per_bar
-                    )
 
                 # Position
-                if event.type != "TimeSig":
-                    pos_index = int(
-                        (event.time - tick_at_current_bar) / ticks_per_sample
-                    )
-                    all_events.append(
-                        self.__create_cp_token(
-                            event.time,
-                            pos=pos_index,
-                            chord=event.value if event.type == "Chord" else None,
-                            tempo=current_tempo if self.config.use_tempos else None,
-                            desc="Position",
-                        )
+                if type_ != _TIME_SIG:
+                    self.__create_cp_position_token(
+                        new_token(event.time, "Position"),
+                        positions[e],
+                        event.value if type_ == _CHORD else None,
+                        current_tempo if self.config.use_tempos else None,
                     )
 
                 previous_tick = event.time
 
             # Update time signature time variables, after adjusting the time (above)
-            if event.type == "TimeSig":
-                current_time_sig = list(map(int, event.value.split("/")))
+            if type_ == _TIME_SIG:
+                current_time_sig = self._time_signature_tuples[event.value]
                 bar_at_last_ts_change += (
                     event.time - tick_at_last_ts_change
                 ) // ticks_per_bar
                 tick_at_last_ts_change = event.time
                 ticks_per_bar = self._compute_ticks_per_bar(
-                    TimeSignature(*current_time_sig, event.time), time_division
+                    current_time_sig, time_division
                 )
                 # We decrease the previous tick so that a Position token is enforced for the next event
                 previous_tick -= 1
 
             # Convert event to CP Event
-            # Update max offset time of the notes encountered
-            if event.type == "Pitch" and e + 2 < len(events):
-                all_events.append(
-                    self.__create_cp_token(
-                        event.time,
-                        pitch=event.value,
-                        vel=events[e + 1].value,
-                        dur=events[e + 2].value,
-                        program=current_program,
-                    )
+            if type_ == _PITCH and e + 2 < len(events):
+                self.__create_cp_note_token(
+                    new_token(event.time),
+                    event.value,
+                    events[e + 1].value,
+                    events[e + 2].value,
+                    current_program,
                 )
-                previous_note_end = max(previous_note_end, event.desc)
-            elif event.type in [
-                "Program",
-                "Tempo",
-                "TimeSig",
-                "Chord",
-            ]:
-                previous_note_end = max(previous_note_end, event.time)
 
-        return all_events
+        tokens = tokens[:nb_tokens]
+        if create_events:
+            tokens = (
+                self._ids_to_tokens(tokens.tolist(), as_str=False) if nb_tokens else []
+            )
+            for token, (time, desc) in zip(tokens, tokens_times_descs):
+                for event in token:
+                    event.time, event.desc = time, desc
+        return tokens
 
-    def __create_cp_token(
-        self,
-        time: int,
-        bar: bool = False,
-        pos: int = None,
-        pitch: int = None,
-        vel: int = None,
-        dur: str = None,
-        chord: str = None,
-        rest: str = None,
-        tempo: float = None,
-        time_signature: str = None,
-        program: int = None,
-        desc: str = "",
-    ) -> List[Event]:
-        r"""Create a CP Word token, with the following structure:
-            (index. Token type)
-            0. Family
-            1. Bar/Position
-            2. Pitch
-            3. Velocity
-            4. Duration
-            (5. Program) optional, associated with notes (pitch/velocity/duration) or chords
-            (6. Chord) optional, chords occurring with position tokens
-            (7. Rest) optional, rest acting as a TimeShift token
-            (8. Tempo) optional, occurring with position tokens
-            (9. TimeSig) optional, occurring with bar tokens
-        NOTE: the first Family token (first in list) will be given as an Event object to keep track
-        of time easily so that other method can sort CP tokens afterwards.
-
-        :param time: the current tick
-        :param bar: True if this token represents a new bar occurring
+    def __create_cp_bar_token(self, token: np.ndarray, time_signature: str = None):
+        r"""Fills (inplace) a Bar CP Word token, given as a row of ids initialized with
+        ``self._ignore_row``. The structure of compound tokens is detailed in the class docstring.
+
+        :param token: the compound token to fill, as a row of ids
+        :param time_signature: time signature value
+        """
+        token[1] = self._bar_id
+        if time_signature is not None:
+            token[self._time_sig_slot] = self._time_signature_ids[time_signature]
+
+    def __create_cp_position_token(
+        self, token: np.ndarray, pos: int, chord: str = None, tempo: float = None
+    ):
+        r"""Fills (inplace) a Position CP Word token, given as a row of ids initialized with
+        ``self._ignore_row``.
+
+        :param token: the compound token to fill, as a row of ids
         :param pos: the position index
-        :param pitch: note pitch
-        :param vel: note velocity
-        :param dur: note duration
         :param chord: chord value
-        :param rest: rest value
-        :param tempo: tempo index
-        :param program: a program number if you want to produce a Program CP token (read note above)
-        :param desc: an optional argument for debug and used to spot position tokens in track_to_tokens
-        :return: The compound token as a list of integers
+        :param tempo: tempo value
         """
+        token[1] = self._position_base_id + pos
+        if chord is not None:
+            token[self._chord_slot] = self._chord_ids[chord]
+        if tempo is not None:
+            token[self._tempo_slot] = self._tempo_ids[tempo]
 
-        def create_event(type_: str, value) -> Event:
-            return Event(type=type_, value=value, time=time, desc=desc)
+    def __create_cp_rest_token(self, token: np.ndarray, rest: Tuple[int, int, int]):
+        r"""Fills (inplace) a Rest CP Word token, given as a row of ids initialized with
+        ``self._ignore_row``.
 
-        cp_token = [
-            Event(type="Family", value="Metric", time=time, desc=desc),
-            Event(type="Ignore", value="None", time=time, desc=desc),
-            Event(type="Ignore", value="None", time=time, desc=desc),
-            Event(type="Ignore", value="None", time=time, desc=desc),
-            Event(type="Ignore", value="None", time=time, desc=desc),
-        ]
-        for add_tok_attr in [
-            "use_programs",
-            "use_chords",
-            "use_rests",
-            "use_tempos",
-            "use_time_signatures",
-        ]:
-            if getattr(self.config, add_tok_attr):
-                cp_token.append(create_event("Ignore", "None"))
+        :param token: the compound token to fill, as a row of ids
+        :param rest: rest value
+        """
+        token[self._rest_slot] = self._rest_ids[rest]
 
-        if bar:
-            cp_token[1] = create_event("Bar", "None")
-            if time_signature is not None:
-                cp_token[self.vocab_types_idx["TimeSig"]] = create_event(
-                    "TimeSig", time_signature
-                )
-        elif pos is not None:
-            cp_token[1] = create_event("Position", pos)
-            if chord is not None:
-                cp_token[self.vocab_types_idx["Chord"]] = create_event("Chord", chord)
-            if tempo is not None:
-                cp_token[self.vocab_types_idx["Tempo"]] = create_event("Tempo", tempo)
-        elif rest is not None:
-            cp_token[self.vocab_types_idx["Rest"]] = create_event("Rest", rest)
-        elif pitch is not None:
-            cp_token[0].value = "Note"
-            cp_token[2] = create_event("Pitch", pitch)
-            cp_token[3] = create_event("Velocity", vel)
-            cp_token[4] = create_event("Duration", dur)
-            if program is not None:
-                cp_token[self.vocab_types_idx["Program"]] = create_event(
-                    "Program", program
-                )
+    def __create_cp_note_token(
+        self, token: np.ndarray, pitch: int, vel: int, dur: str, program: int = None
+    ):
+        r"""Fills (inplace) a Note CP Word token, given as a row of ids initialized with
+        ``self._ignore_row``.
 
-        return cp_token
+        :param token: the compound token to fill, as a row of ids
+        :param pitch: note pitch
+        :param vel: note velocity
+        :param dur: note duration
+        :param program: program number of the note
+        """
+        token[0] = self._family_note_id
+        token[2] = self._pitch_offset_id + pitch
+        token[3] = self._velocity_ids[vel]
+        token[4] = self._duration_ids[dur]
+        if program is not None:
+            token[self._program_slot] = self._program_ids[program]
 
-    @_in_as_seq()
+    @_in_as_seq(complete=False)
     def tokens_to_midi(
         self,
         tokens: Union[
@@ -361,8 +623,11 @@ class CPWord(MIDITokenizer):
         # Unsqueeze tokens in case of one_token_stream
         if self.one_token_stream:  # ie single token seq
             tokens = [tokens]
+        # The sequences are decoded from their ids only, the tokens are not computed if missing
         for i in range(len(tokens)):
-            tokens[i] = tokens[i].tokens
+            if tokens[i].ids is None:
+                self.complete_sequence(tokens[i])
+            tokens[i] = tokens[i].ids
         midi = MidiFile(ticks_per_beat=time_division)
         assert (
             time_division % max(self.config.beat_res.values()) == 0
@@ -382,42 +647,42 @@ class CPWord(MIDITokenizer):
                     name="Drums" if prog == -1 else MIDI_INSTRUMENTS[prog]["name"],
                 )
 
-        current_tick = tick_at_last_ts_change = tick_at_current_bar = 0
-        current_bar = -1
-        bar_at_last_ts_change = 0
+        # The compound tokens are decoded from their ids by _decode_cp_tokens, tokens without
+        # value (Ignore_None or special tokens) having ids inferior or equal to the one of
+        # Ignore_None in each vocabulary
+        tables = self._cp_decoding_tables(time_division)
+        family_metric_id, bar_id = self._family_metric_id, self._bar_id
+        slots_idx = [
+            self.vocab_types_idx.get(type_, -1)
+            for type_ in ["Program", "Rest", "Tempo", "TimeSig"]
+        ]
+        time_sig_idx = slots_idx[3]
+
         current_program = 0
         current_instrument = None
-        previous_note_end = 0
+        max_tick = 0
         for si, seq in enumerate(tokens):
             # First look for the first time signature if needed
             if si == 0:
                 if self.config.use_time_signatures:
                     for compound_token in seq:
-                        token_family = compound_token[0].split("_")[1]
-                        if token_family == "Metric":
-                            bar_pos = compound_token[1].split("_")[0]
-                            if bar_pos == "Bar":
-                                num, den = self._parse_token_time_signature(
-                                    compound_token[
-                                        self.vocab_types_idx["TimeSig"]
-                                    ].split("_")[1]
-                                )
-                                time_signature_changes.append(
-                                    TimeSignature(num, den, 0)
-                                )
+                        if compound_token[0] == family_metric_id:
+                            if compound_token[1] == bar_id:
+                                time_sig = self._time_signature_values[
+                                    compound_token[time_sig_idx]
+                                ]
+                                if time_sig is not None:
+                                    time_signature_changes.append(
+                                        TimeSignature(*time_sig, 0)
+                                    )
                                 break
                         else:
                             break
                 if len(time_signature_changes) == 0:
                     time_signature_changes.append(TimeSignature(*TIME_SIGNATURE, 0))
             current_time_sig = time_signature_changes[0]
-            ticks_per_bar = self._compute_ticks_per_bar(current_time_sig, time_division)
             # Set track / sequence program if needed
             if not self.one_token_stream:
-                current_tick = tick_at_last_ts_change = tick_at_current_bar = 0
-                current_bar = -1
-                bar_at_last_ts_change = 0
-                previous_note_end = 0
                 is_drum = False
                 if programs is not None:
                     current_program, is_drum = programs[si]
@@ -429,102 +694,63 @@ class CPWord(MIDITokenizer):
                     else MIDI_INSTRUMENTS[current_program]["name"],
                 )
 
-            # Decode tokens
-            for ti, compound_token in enumerate(seq):
-                token_family = compound_token[0].split("_")[1]
-                if token_family == "Note":
-                    pad_range_idx = 6 if self.config.use_programs else 5
-                    if any(
-                        tok.split("_")[1] == "None"
-                        for tok in compound_token[2:pad_range_idx]
-                    ):
-                        continue
-                    pitch = int(compound_token[2].split("_")[1])
-                    vel = int(compound_token[3].split("_")[1])
-                    duration = self._token_duration_to_ticks(
-                        compound_token[4].split("_")[1], time_division
-                    )
-                    if self.config.use_programs:
-                        current_program = int(compound_token[5].split("_")[1])
-                    new_note = Note(vel, pitch, current_tick, current_tick + duration)
-                    if self.one_token_stream:
-                        check_inst(current_program)
-                        instruments[current_program].notes.append(new_note)
-                    else:
-                        current_instrument.notes.append(new_note)
-                    previous_note_end = max(previous_note_end, current_tick + duration)
-
-                elif token_family == "Metric":
-                    bar_pos = compound_token[1].split("_")[0]
-                    if bar_pos == "Bar":
-                        current_bar += 1
-                        if current_bar > 0:
-                            current_tick = tick_at_current_bar + ticks_per_bar
-                        tick_at_current_bar = current_tick
-                        # Add new TS only if different from the last one
-                        if self.config.use_time_signatures:
-                            num, den = self._parse_token_time_signature(
-                                compound_token[self.vocab_types_idx["TimeSig"]].split(
-                                    "_"
-                                )[1]
-                            )
-                            if (
-                                num != current_time_sig.numerator
-                                or den != current_time_sig.denominator
-                            ):
-                                current_time_sig = TimeSignature(num, den, current_tick)
-                                if si == 0:
-                                    time_signature_changes.append(current_time_sig)
-                                tick_at_last_ts_change = tick_at_current_bar
-                                bar_at_last_ts_change = current_bar
-                                ticks_per_bar = self._compute_ticks_per_bar(
-                                    current_time_sig, time_division
-                                )
-                    elif bar_pos == "Position":  # i.e. its a position
-                        if current_bar == -1:
-                            # in case this Position token comes before any Bar token
-                            current_bar = 0
-                        current_tick = (
-                            tick_at_current_bar
-                            + int(compound_token[1].split("_")[1]) * ticks_per_sample
-                        )
-                        # Add new tempo change only if different from the last one
-                        if self.config.use_tempos and si == 0:
-                            tempo = float(
-                                compound_token[self.vocab_types_idx["Tempo"]].split(
-                                    "_"
-                                )[1]
-                            )
-                            if (
-                                tempo != tempo_changes[-1].tempo
-                                and current_tick != tempo_changes[-1].time
-                            ):
-                                tempo_changes.append(TempoChange(tempo, current_tick))
-                    elif (
-                        self.config.use_rests
-                        and compound_token[self.vocab_types_idx["Rest"]].split("_")[1]
-                        != "None"
-                    ):
-                        current_tick = max(previous_note_end, current_tick)
-                        current_tick += self._token_duration_to_ticks(
-                            compound_token[self.vocab_types_idx["Rest"]].split("_")[1],
-                            time_division,
-                        )
-                        real_current_bar = (
-                            bar_at_last_ts_change
-                            + (current_tick - tick_at_last_ts_change) // ticks_per_bar
-                        )
-                        if real_current_bar > current_bar:
-                            tick_at_current_bar += (
-                                real_current_bar - current_bar
-                            ) * ticks_per_bar
-                            current_bar = real_current_bar
-
-                    previous_note_end = max(previous_note_end, current_tick)
+            # Decode tokens, the ids are checked as the kernel indexes the tables with them
+            seq = np.array(seq, dtype=np.int64).reshape(-1, self._cp_slot_count)
+            self._check_cp_ids(seq)
+            decode_cp_tokens = _decode_cp_tokens
+            if not _NUMBA_AVAILABLE:
+                seq = seq.tolist()
+                # Pure Python function, if numba is installed but disabled
+                decode_cp_tokens = getattr(
+                    _decode_cp_tokens, "py_func", decode_cp_tokens
+                )
+            notes, tempos, time_sigs = decode_cp_tokens(
+                seq,
+                *tables,
+                self._family_note_id,
+                family_metric_id,
+                bar_id,
+                *slots_idx,
+                ticks_per_sample,
+                time_division,
+                current_time_sig.numerator,
+                current_time_sig.denominator,
+                self._tempo_ids.get(float(tempo_changes[-1].tempo), -1)
+                if self.config.use_tempos
+                else -1,
+                current_program,
+                self.config.use_tempos and si == 0,
+            )
 
-            # Add current_inst to midi and handle notes still active
-            if not self.one_token_stream:
+            # Create the notes, tempo and time signature changes
+            if len(notes) > 0:
+                max_tick = max(max_tick, int(notes[:, 3].max()))
+            if self.one_token_stream:
+                # Instruments are created once per program, in order of first appearance
+                programs_used, first_notes = np.unique(notes[:, 4], return_index=True)
+                for program in programs_used[np.argsort(first_notes)].tolist():
+                    check_inst(program)
+                    instruments[program].notes = [
+                        Note(vel, pitch, start, end)
+                        for pitch, vel, start, end, _ in notes[
+                            notes[:, 4] == program
+                        ].tolist()
+                    ]
+            else:
+                current_instrument.notes = [
+                    Note(vel, pitch, start, end)
+                    for pitch, vel, start, end, _ in notes.tolist()
+                ]
                 midi.instruments.append(current_instrument)
+            if si == 0:
+                tempo_changes += [
+                    TempoChange(self._tempo_values[tempo_id], tick)
+                    for tempo_id, tick in tempos.tolist()
+                ]
+                time_signature_changes += [
+                    TimeSignature(num, den, tick)
+                    for num, den, tick in time_sigs.tolist()
+                ]
 
         if len(tempo_changes) > 1:
             del tempo_changes[0]  # delete mocked tempo change
@@ -535,12 +761,7 @@ class CPWord(MIDITokenizer):
             midi.instruments = list(instruments.values())
         midi.tempo_changes = tempo_changes
         midi.time_signature_changes = time_signature_changes
-        midi.max_tick = max(
-            [
-                max([note.end for note in track.notes]) if len(track.notes) > 0 else 0
-                for track in midi.instruments
-            ]
-        )
+        midi.max_tick = max_tick
         # Write MIDI file
         if output_path:
             Path(output_path).mkdir(parents=True, exist_ok=True)
@@ -559,6 +780,18 @@ class CPWord(MIDITokenizer):
         :return: the vocabulary as a list of string.
         """
 
+        def tokens_of(token_type: str, values, sep: str = ".") -> List[str]:
+            # Formats the tokens of (possibly multi-component) values in a vectorized way
+            values = np.asarray(values)
+            if values.ndim == 1:
+                values = values[:, None]
+            values_str = values[:, 0].astype(str)
+            for column in values[:, 1:].T:
+                values_str = np.char.add(
+                    np.char.add(values_str, sep), column.astype(str)
+                )
+            return np.char.add(f"{token_type}_", values_str).tolist()
+
         vocab = [[] for _ in range(5)]
 
         vocab[0].append("Family_Metric")
@@ -583,9 +816,7 @@ class CPWord(MIDITokenizer):
 
         # DURATION
         vocab[4].append("Ignore_None")
-        vocab[4] += [
-            f'Duration_{".".join(map(str, duration))}' for duration in self.durations
-        ]
+        vocab[4] += tokens_of("Duration", self.durations)
 
         # PROGRAM
         if self.config.use_programs:
@@ -600,21 +831,15 @@ class CPWord(MIDITokenizer):
 
         # REST
         if self.config.use_rests:
-            vocab += [
-                ["Ignore_None"]
-                + [f'Rest_{".".join(map(str, rest))}' for rest in self.rests]
-            ]
+            vocab += [["Ignore_None"] + tokens_of("Rest", self.rests)]
 
         # TEMPO
         if self.config.use_tempos:
-            vocab += [["Ignore_None"] + [f"Tempo_{i}" for i in self.tempos]]
+            vocab += [["Ignore_None"] + tokens_of("Tempo", self.tempos)]
 
         # TIME_SIGNATURE
         if self.config.use_time_signatures:
-            vocab += [
-                ["Ignore_None"]
-                + [f"TimeSig_{i[0]}/{i[1]}" for i in self.time_signatures]
-            ]
+            vocab += [["Ignore_None"] + tokens_of("TimeSig", self.time_signatures, "/")]
 
         return vocab
 
@@ -627,7 +852,9 @@ class CPWord(MIDITokenizer):
         Here the combination of Pitch, Velocity and Duration tokens is represented by
         "Pitch" in the graph.
         NOTE: Program type is not referenced here, you can add it manually by
-        modifying the tokens_types_graph class attribute following your strategy.
+        modifying the tokens_types_graph class attribute following your strategy,
+        and then call `_create_token_types_succession_matrix` to update the successions
+        checked by `tokens_errors`.
 
         :return: the token types transitions dictionary
         """
@@ -658,7 +885,124 @@ class CPWord(MIDITokenizer):
 
         return dic
 
-    @_in_as_seq()
+    def add_to_vocab(
+        self,
+        token: Union[str, Event],
+        vocab_idx: int = None,
+        byte_: str = None,
+        add_to_bpe_model: bool = False,
+    ):
+        r"""Adds an event to the vocabulary. Its index (int) will be the length of the vocab.
+        The lookup tables of the compound tokens, indexed by ids, are then recreated to
+        include it.
+
+        :param token: token to add, as a formatted string of the form "Type_Value", e.g. Pitch_80, or an Event.
+        :param vocab_idx: idx of the vocabulary (in case of embedding pooling). (default: None)
+        :param byte_: unique byte associated to the token. This is used when building the vocabulary with
+            fast BPE. If None is given, it will default to ``chr(id_ + CHR_ID_START)`` . (default: None)
+        :param add_to_bpe_model: the token will be added to the bpe_model vocabulary too. (default: None)
+        """
+        super().add_to_vocab(token, vocab_idx, byte_, add_to_bpe_model)
+        # At init, the vocabularies are created before the lookup tables
+        if hasattr(self, "_cp_decoding_luts"):
+            self._create_cp_lookup_tables()
+            self._create_token_types_succession_matrix()
+
+    def _create_token_types_succession_matrix(self):
+        r"""Creates the matrix of the possible token types successions from
+        ``self.tokens_types_graph``, used by :meth:`miditok.CPWord.tokens_errors`.
+        Each token type is given an integer code, ``self._token_types_succession[i, j]``
+        telling if a token of type of code j can follow a token of type of code i.
+        The last code is given to unknown token types, which cannot precede nor follow
+        any token. This method has to be called again if ``self.tokens_types_graph`` is modified.
+        The successions are also mapped to the action performed by ``tokens_errors`` in
+        ``self._token_types_actions``: counting an error for bad successions, resetting
+        the state for Bar, checking the Pitch or Position values, or setting the Position
+        without checking it after a Rest.
+        """
+        self._token_type_codes = {}
+        for type_, next_types in self.tokens_types_graph.items():
+            for type__ in [type_] + next_types:
+                self._token_type_codes.setdefault(type__, len(self._token_type_codes))
+        nb_types = len(self._token_type_codes) + 1  # + unknown types
+        self._token_types_succession = np.zeros((nb_types, nb_types), dtype=bool)
+        for type_, next_types in self.tokens_types_graph.items():
+            for next_type in next_types:
+                self._token_types_succession[
+                    self._token_type_codes[type_], self._token_type_codes[next_type]
+                ] = True
+
+        codes, succession = self._token_type_codes, self._token_types_succession
+        self._token_types_actions = np.where(succession, _GOOD_TYPE, _BAD_TYPE).astype(
+            np.int8
+        )
+        for type_, action in (
+            ("Bar", _RESET_BAR),
+            ("Pitch", _CHECK_PITCH),
+            ("Position", _CHECK_POSITION),
+        ):
+            self._token_types_actions[
+                succession[:, codes[type_]], codes[type_]
+            ] = action
+        if "Rest" in codes and succession[codes["Rest"], codes["Position"]]:
+            self._token_types_actions[codes["Rest"], codes["Position"]] = _SET_POSITION
+
+        # Type codes of the tokens of each vocabulary, indexed by ids. The types of all the
+        # tokens are split in a single pass, and each distinct type is looked up once.
+        self._token_types_of_ids = []
+        for vocab in self.vocab:
+            types, inverse = np.unique(
+                np.char.partition(np.array(list(vocab.keys())), "_")[:, 0],
+                return_inverse=True,
+            )
+            types_codes = np.array(
+                [codes.get(type_, nb_types - 1) for type_ in types.tolist()]
+            )
+            types_of_ids = np.empty(len(vocab), dtype=np.int64)
+            types_of_ids[list(vocab.values())] = types_codes[inverse]
+            self._token_types_of_ids.append(types_of_ids)
+
+    def _cp_tokens_types(self, tokens: np.ndarray) -> np.ndarray:
+        r"""Returns the type codes (see :meth:`miditok.CPWord._create_token_types_succession_matrix`)
+        of compound tokens. The type of a Note token is the one of its Pitch token, the type
+        of a Metric token is Bar / Position, or otherwise the one of its first additional
+        token (last vocabularies) which is not Ignore_None. Compound tokens with a special
+        token as family are typed as PAD.
+
+        :param tokens: compound tokens, as an array of ids of shape (N,T).
+        :return: the type codes of the compound tokens.
+        """
+        type_codes = self._token_type_codes
+        unknown_code = len(type_codes)
+        types = np.full(len(tokens), type_codes.get("PAD", unknown_code))
+
+        is_note = tokens[:, 0] == self._family_note_id
+        types[is_note] = self._token_types_of_ids[2][tokens[is_note, 2]]
+
+        is_metric = tokens[:, 0] == self._family_metric_id
+        bar_pos_types = self._token_types_of_ids[1][tokens[:, 1]]
+        is_bar_pos = is_metric & (
+            (bar_pos_types == type_codes["Bar"])
+            | (bar_pos_types == type_codes["Position"])
+        )
+        types[is_bar_pos] = bar_pos_types[is_bar_pos]
+
+        # Additional tokens: the type of the first one (from the last vocabulary) not Ignore_None
+        additional = np.flatnonzero(is_metric & ~is_bar_pos)
+        if len(additional) > 0:
+            rows = tokens[additional, -4:][:, ::-1]
+            not_ignore = rows != self._ignore_row[-4:][::-1]
+            if not np.all(not_ignore.any(axis=1)):
+                raise RuntimeError("No token type found, unknown error")
+            first = not_ignore.argmax(axis=1)
+            types[additional] = np.stack(
+                [self._token_types_of_ids[-i][rows[:, i - 1]] for i in range(1, 5)],
+                axis=1,
+            )[np.arange(len(additional)), first]
+
+        return types
+
+    @_in_as_seq(complete=False)
     def tokens_errors(
         self, tokens: Union[TokSequence, List, np.ndarray, Any]
     ) -> Union[float, List[float]]:
@@ -668,62 +1012,389 @@ class CPWord(MIDITokenizer):
             - a position token cannot have a value <= to the current position (it would go back in time)
             - a pitch token should not be present if the same pitch is already played at the current position
 
-        :param tokens: sequence of tokens to check
+        :param tokens: sequence of tokens to check, or list of sequences which are then
+            checked by :meth:`miditok.CPWord.tokens_errors_batch`
         :return: the error ratio (lower is better)
         """
-        # If list of TokSequence -> recursive
         if isinstance(tokens, list):
-            return [self.tokens_errors(tok_seq) for tok_seq in tokens]
-
-        def cp_token_type(tok: List[int]) -> List[str]:
-            family = self[0, tok[0]].split("_")[1]
-            if family == "Note":
-                return self[2, tok[2]].split("_")
-            elif family == "Metric":
-                bar_pos = self[1, tok[1]].split("_")
-                if bar_pos[0] in ["Bar", "Position"]:
-                    return bar_pos
-                else:  # additional token
-                    for i in range(1, 5):
-                        decoded_token = self[-i, tok[-i]].split("_")
-                        if decoded_token[0] != "Ignore":
-                            return decoded_token
-                raise RuntimeError("No token type found, unknown error")
-            elif family == "None":
-                return ["PAD", "None"]
-            else:  # Program
-                raise RuntimeError("No token type found, unknown error")
+            return self.tokens_errors_batch(tokens)
+        return self._tokens_errors_one(tokens)
 
-        tokens = tokens.ids
-        err = 0
-        previous_type = cp_token_type(tokens[0])[0]
-        current_pos = -1
-        program = 0
-        current_pitches = {p: [] for p in self.config.programs}
-
-        for token in tokens[1:]:
-            token_type, token_value = cp_token_type(token)
-            # Good token type
-            if token_type in self.tokens_types_graph[previous_type]:
-                if token_type == "Bar":  # reset
-                    current_pos = -1
-                    current_pitches = {p: [] for p in self.config.programs}
-                elif token_type == "Pitch":
-                    if self.config.use_programs:
-                        program = int(self[5, token[5]].split("_")[1])
-                    if int(token_value) in current_pitches[program]:
-                        err += 1  # pitch already played at current position
-                    else:
-                        current_pitches[program].append(int(token_value))
-                elif token_type == "Position":
-                    if int(token_value) <= current_pos and previous_type != "Rest":
-                        err += 1  # token position value <= to the current position
-                    else:
-                        current_pos = int(token_value)
-                        current_pitches = {p: [] for p in self.config.programs}
-            # Bad token type
+    @_in_as_seq(complete=False)
+    def tokens_errors_batch(
+        self, tokens: Union[List[TokSequence], List, np.ndarray, Any]
+    ) -> List[float]:
+        r"""Checks several sequences of tokens at once, and returns their error ratios.
+        See :meth:`miditok.CPWord.tokens_errors`.
+        If numba is installed, the sequences are analyzed in parallel threads.
+
+        :param tokens: sequences of tokens to check
+        :return: the error ratios of the sequences (lower is better)
+        """
+        if len(tokens) == 0:
+            return []
+        ids = [self._cp_ids_array(self._sequence_ids(seq)) for seq in tokens]
+        lengths = np.array([len(seq_ids) for seq_ids in ids])
+        errors = self._count_tokens_errors(
+            np.concatenate(ids),
+            np.concatenate([[0], np.cumsum(lengths)]),
+            parallel=len(ids) > 1,
+        )
+        return (errors / np.maximum(lengths, 1)).tolist()  # empty sequences: 0
+
+    def _tokens_errors_one(self, tokens: TokSequence) -> float:
+        r"""Returns the error ratio of a single sequence of tokens.
+        See :meth:`miditok.CPWord.tokens_errors`.
+
+        :param tokens: sequence of tokens to check
+        :return: the error ratio (lower is better)
+        """
+        ids = self._cp_ids_array(self._sequence_ids(tokens))
+        nb_errors = self._count_tokens_errors(ids, np.array([0, len(ids)]))
+        return nb_errors.item() / max(len(ids), 1)  # empty sequence: 0
+
+    def _sequence_ids(self, tokens: TokSequence) -> List[List[int]]:
+        r"""Returns the ids of a sequence, completing it if they are missing.
+
+        :param tokens: sequence of tokens.
+        :return: the ids of the sequence.
+        """
+        if tokens.ids is None:
+            self.complete_sequence(tokens)
+        return tokens.ids
+
+    def _cp_ids_array(self, ids: Union[List[List[int]], np.ndarray]) -> np.ndarray:
+        r"""Converts the ids of a sequence of compound tokens to a contiguous array.
+
+        :param ids: ids of the compound tokens.
+        :return: the ids, as a C-contiguous int32 array of shape (N,T).
+        """
+        try:
+            ids = np.ascontiguousarray(ids, dtype=np.int32)
+        except ValueError:
+            raise ValueError(
+                "The compound tokens of a sequence must all have the same number of ids"
+            )
+        if ids.size == 0:
+            return ids.reshape(0, len(self.vocab))
+        if ids.ndim != 2 or ids.shape[1] != len(self.vocab):
+            raise ValueError(
+                f"Compound tokens must be made of {len(self.vocab)} ids, got an array of"
+                f" ids of shape {ids.shape}"
+            )
+        self._check_cp_ids(ids)
+        return ids
+
+    def _check_cp_ids(self, ids: np.ndarray):
+        r"""Checks that the ids of compound tokens are within their vocabularies, as the
+        compiled kernels index the lookup tables with them without bounds checks.
+        Raises a KeyError with the first unknown id otherwise, as when getting it
+        from the vocabulary.
+
+        :param ids: compound tokens, as an array of ids of shape (N,T).
+        """
+        unknown = (ids < 0) | (ids >= self._vocab_sizes)
+        if unknown.any():
+            raise KeyError(int(ids[unknown][0]))
+
+    def _count_tokens_errors(
+        self, tokens: np.ndarray, offsets: np.ndarray, parallel: bool = False
+    ) -> np.ndarray:
+        r"""Counts the errors of sequences of compound tokens, concatenated in a single array.
+        See :meth:`miditok.CPWord.tokens_errors`.
+
+        :param tokens: compound tokens of the sequences, as an array of ids of shape (N,T).
+        :param offsets: indexes of the first tokens of each sequence, followed by N.
+        :param parallel: analyze the sequences in a pool of threads, if numba is installed.
+            The compiled function releases the GIL. (default: False)
+        :return: the number of errors of each sequence.
+        """
+        types = self._cp_tokens_types(tokens)
+        positions = self._position_ints[tokens[:, 1]]
+        pitches = self._pitch_ints[tokens[:, 2]]
+        if self.config.use_programs:
+            programs = self._program_rows[tokens[:, self._program_slot]]
+        else:
+            programs = np.zeros(len(tokens), dtype=np.int16)
+        nb_programs = self._nb_program_rows
+
+        # Compiled state machine
+        if _NUMBA_AVAILABLE:
+            args = (
+                types,
+                positions,
+                pitches,
+                programs,
+                self._token_types_actions,
+                nb_programs,
+                self._nb_pitch_values,
+            )
+            bounds = zip(offsets[:-1].tolist(), offsets[1:].tolist())
+            if parallel:
+                with ThreadPoolExecutor() as pool:
+                    errors = list(
+                        pool.map(
+                            lambda bound: _count_cp_tokens_errors(*args, *bound),
+                            bounds,
+                        )
+                    )
+            else:
+                errors = [_count_cp_tokens_errors(*args, *bound) for bound in bounds]
+            return np.array(errors, dtype=np.int64)
+
+        # Actions of the successions, the first tokens of the sequences having none
+        nb_sequences = len(offsets) - 1
+        sequence_ids = np.repeat(np.arange(nb_sequences), np.diff(offsets))
+        actions = np.full(len(tokens), _GOOD_TYPE, dtype=np.int8)
+        actions[1:] = self._token_types_actions[types[:-1], types[1:]]
+        firsts = offsets[:-1][offsets[:-1] < len(tokens)]
+        actions[firsts] = _GOOD_TYPE
+        errors = actions == _BAD_TYPE  # bad token types successions
+
+        # Pitch and Position values of good tokens, analyzed with segmented scans
+        to_check = np.flatnonzero(actions >= _RESET_BAR)
+        actions, sequence_ids_ = actions[to_check], sequence_ids[to_check]
+        positions = positions[to_check].astype(np.int64)
+        is_first = np.ones(len(to_check), dtype=bool)
+        is_first[1:] = sequence_ids_[1:] != sequence_ids_[:-1]
+
+        # Position values: the current position is the running max of the positions since
+        # the last Bar, Position following a Rest, or beginning of the sequence
+        is_position = (actions == _CHECK_POSITION) | (actions == _SET_POSITION)
+        starts = is_first | (actions == _RESET_BAR) | (actions == _SET_POSITION)
+        segments = np.cumsum(starts) << 16  # positions values are < 2**15
+        running_max = np.maximum.accumulate(
+            segments + np.where(is_position, positions, -1) + 1
+        )
+        current_pos = np.full(len(to_check), -1)
+        current_pos[1:] = running_max[:-1] - segments[1:] - 1
+        current_pos[starts] = -1
+        bad_positions = (actions == _CHECK_POSITION) & (positions <= current_pos)
+
+        # Pitch values: a pitch cannot be played twice by a program between two resets
+        is_pitch = actions == _CHECK_PITCH
+        programs = programs[to_check].astype(np.int64)
+        no_program = is_pitch & (programs == -1)
+        resets = starts | ((actions == _CHECK_POSITION) & ~bad_positions)
+        played = np.flatnonzero(is_pitch & ~no_program)
+        keys = np.cumsum(resets)[played] * nb_programs + programs[played]
+        keys *= self._nb_pitch_values
+        keys += pitches[to_check][played]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        duplicates = order[1:][sorted_keys[1:] == sorted_keys[:-1]]
+
+        errors[to_check[bad_positions | no_program]] = True
+        errors[to_check[played[duplicates]]] = True
+        errors = np.bincount(sequence_ids, weights=errors, minlength=nb_sequences)
+        errors = errors.astype(np.int64)
+
+        return errors
+
+
+@njit(cache=True)
+def _decode_cp_tokens(
+    tokens,
+    ignore_ids,
+    position_lut,
+    pitch_lut,
+    velocity_lut,
+    duration_lut,
+    program_lut,
+    rest_lut,
+    time_sig_lut,
+    family_note_id: int,
+    family_metric_id: int,
+    bar_id: int,
+    program_idx: int,
+    rest_idx: int,
+    tempo_idx: int,
+    time_sig_idx: int,
+    ticks_per_sample: int,
+    time_division: int,
+    time_sig_num: int,
+    time_sig_den: int,
+    current_tempo_id: int,
+    current_program: int,
+    decode_tempos: bool,
+):
+    r"""Decodes a sequence of CPWord compound tokens, given as ids, into notes, tempo changes
+    and time signature changes. It only performs integer arithmetic over the token ids and
+    the lookup tables given by :meth:`miditok.CPWord._cp_decoding_tables`, and is compiled
+    with numba when it is installed.
+
+    :param tokens: compound tokens ids, of shape (N,T) with T the number of token types.
+    :param ignore_ids: ids of the Ignore_None tokens (and Family_Metric) of each vocabulary.
+    :param position_lut: Position values, per id, -1 for non Position tokens.
+    :param pitch_lut: Pitch values, per id.
+    :param velocity_lut: Velocity values, per id.
+    :param duration_lut: Duration values in ticks, per id.
+    :param program_lut: Program values, per id.
+    :param rest_lut: Rest values in ticks, per id.
+    :param time_sig_lut: time signatures (numerator, denominator, ticks per bar), per id.
+    :param family_note_id: id of the Family_Note token.
+    :param family_metric_id: id of the Family_Metric token.
+    :param bar_id: id of the Bar_None token.
+    :param program_idx: index of the Program vocabulary, -1 if not used.
+    :param rest_idx: index of the Rest vocabulary, -1 if not used.
+    :param tempo_idx: index of the Tempo vocabulary, -1 if not used.
+    :param time_sig_idx: index of the TimeSig vocabulary, -1 if not used.
+    :param ticks_per_sample: number of ticks per position.
+    :param time_division: MIDI time division / resolution, in ticks/beat.
+    :param time_sig_num: numerator of the time signature at the beginning of the sequence.
+    :param time_sig_den: denominator of the time signature at the beginning of the sequence.
+    :param current_tempo_id: id of the tempo at the beginning of the sequence, -1 if it is
+        not in the vocabulary.
+    :param current_program: program of the notes if programs are not used.
+    :param decode_tempos: whether to decode tempo changes.
+    :return: the notes as an array of shape (N,5) (pitch, velocity, start, end, program),
+        the tempo changes as (tempo id, tick) and time signature changes as (num, den, tick).
+    """
+    nb_tokens = len(tokens)
+    notes = np.empty((nb_tokens, 5), dtype=np.int64)
+    tempos = np.empty((nb_tokens, 2), dtype=np.int64)
+    time_sigs = np.empty((nb_tokens, 3), dtype=np.int64)
+    nb_notes = nb_tempos = nb_time_sigs = 0
+    pad_range_idx = 5 if program_idx == -1 else 6
+
+    ticks_per_bar = int(time_division * 4 * time_sig_num / time_sig_den)
+    current_tick = tick_at_last_ts_change = tick_at_current_bar = 0
+    current_bar = -1
+    bar_at_last_ts_change = 0
+    previous_note_end = 0
+    tempo_tick = -1
+    for ti in range(nb_tokens):
+        compound_token = tokens[ti]
+        if compound_token[0] == family_note_id:
+            is_complete = True
+            for i in range(2, pad_range_idx):
+                if compound_token[i] <= ignore_ids[i]:
+                    is_complete = False
+                    break
+            if not is_complete:
+                continue
+            note_end = current_tick + duration_lut[compound_token[4]]
+            if program_idx != -1:
+                current_program = program_lut[compound_token[program_idx]]
+            notes[nb_notes, 0] = pitch_lut[compound_token[2]]
+            notes[nb_notes, 1] = velocity_lut[compound_token[3]]
+            notes[nb_notes, 2] = current_tick
+            notes[nb_notes, 3] = note_end
+            notes[nb_notes, 4] = current_program
+            nb_notes += 1
+            previous_note_end = max(previous_note_end, note_end)
+
+        elif compound_token[0] == family_metric_id:
+            if compound_token[1] == bar_id:
+                current_bar += 1
+                if current_bar > 0:
+                    current_tick = tick_at_current_bar + ticks_per_bar
+                tick_at_current_bar = current_tick
+                # Add new TS only if different from the last one
+                if time_sig_idx != -1:
+                    time_sig = time_sig_lut[compound_token[time_sig_idx]]
+                    num, den = time_sig[0], time_sig[1]
+                    if num > 0 and (num != time_sig_num or den != time_sig_den):
+                        time_sig_num, time_sig_den = num, den
+                        time_sigs[nb_time_sigs, 0] = num
+                        time_sigs[nb_time_sigs, 1] = den
+                        time_sigs[nb_time_sigs, 2] = current_tick
+                        nb_time_sigs += 1
+                        tick_at_last_ts_change = tick_at_current_bar
+                        bar_at_last_ts_change = current_bar
+                        ticks_per_bar = time_sig[2]
+            elif position_lut[compound_token[1]] != -1:
+                if current_bar == -1:
+                    # in case this Position token comes before any Bar token
+                    current_bar = 0
+                current_tick = (
+                    tick_at_current_bar
+                    + position_lut[compound_token[1]] * ticks_per_sample
+                )
+                # Add new tempo change only if different from the last one. The tempos
+                # are compared by ids, which are unique per tempo value.
+                if decode_tempos:
+                    tempo_id = compound_token[tempo_idx]
+                    if (
+                        tempo_id != current_tempo_id
+                        and tempo_id > ignore_ids[tempo_idx]
+                        and current_tick != tempo_tick
+                    ):
+                        current_tempo_id, tempo_tick = tempo_id, current_tick
+                        tempos[nb_tempos, 0] = tempo_id
+                        tempos[nb_tempos, 1] = current_tick
+                        nb_tempos += 1
+            elif rest_idx != -1 and compound_token[rest_idx] > ignore_ids[rest_idx]:
+                current_tick = max(previous_note_end, current_tick)
+                current_tick += rest_lut[compound_token[rest_idx]]
+                real_current_bar = (
+                    bar_at_last_ts_change
+                    + (current_tick - tick_at_last_ts_change) // ticks_per_bar
+                )
+                if real_current_bar > current_bar:
+                    # a Rest before any Bar token counts bars from the first one
+                    tick_at_current_bar += (
+                        real_current_bar - max(current_bar, 0)
+                    ) * ticks_per_bar
+                    current_bar = real_current_bar
+
+            previous_note_end = max(previous_note_end, current_tick)
+
+    return notes[:nb_notes], tempos[:nb_tempos], time_sigs[:nb_time_sigs]
+
+
+@njit(cache=True, nogil=True)
+def _count_cp_tokens_errors(
+    types,
+    positions,
+    pitches,
+    programs,
+    actions,
+    nb_programs: int,
+    nb_pitches: int,
+    start: int,
+    end: int,
+) -> int:
+    r"""Counts the errors of a sequence of CPWord compound tokens, as analyzed by
+    :meth:`miditok.CPWord.tokens_errors`: bad token types successions, Position tokens
+    going back in time and Pitch tokens already played at the current position.
+    The sequence is delimited by ``start`` and ``end`` in the arrays, that can hold several
+    concatenated sequences. It only works with integer arrays, and is compiled with numba
+    when it is installed.
+
+    :param types: type codes of the compound tokens, of shape (N).
+    :param positions: Position values of the compound tokens, of shape (N).
+    :param pitches: Pitch values of the compound tokens, of shape (N).
+    :param programs: indexes of the programs of the compound tokens, -1 if none, of shape (N).
+    :param actions: actions to perform for each types succession, indexed by type codes.
+    :param nb_programs: number of programs.
+    :param nb_pitches: number of pitch values, greater than the highest one.
+    :param start: index of the first token of the sequence.
+    :param end: index following the last token of the sequence.
+    :return: the number of errors of the sequence.
+    """
+    err = 0
+    current_pos = -1
+    played = np.zeros((nb_programs, nb_pitches), dtype=np.bool_)
+    for ti in range(start + 1, end):
+        action = actions[types[ti - 1], types[ti]]
+        if action == _BAD_TYPE:
+            err += 1  # bad token type
+        elif action == _RESET_BAR:
+            current_pos = -1
+            played[:] = False
+        elif action == _CHECK_PITCH:
+            program, pitch = programs[ti], pitches[ti]
+            if program == -1:
+                err += 1  # note without program
+            elif played[program, pitch]:
+                err += 1  # pitch already played at current position
             else:
-                err += 1
-            previous_type = token_type
+                played[program, pitch] = True
+        elif action == _CHECK_POSITION and positions[ti] <= current_pos:
+            err += 1  # token position value <= to the current position
+        elif action != _GOOD_TYPE:  # Position, after a Rest it can go back
+            current_pos = positions[ti]
+            played[:] = False
 
-        return err / len(tokens)
+    return err
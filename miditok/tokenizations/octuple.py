@@ -431,7 +431,8 @@ class Octuple(MIDITokenizer):
 
         err = 0
         current_bar = current_pos = -1
-        current_pitches = {p: [] for p in self.config.programs}
+        # Pitches played at the current position, as (program, pitch), cleared in place
+        current_pitches = set()
         current_program = 0
 
         for token in tokens.tokens:
@@ -451,20 +452,21 @@ class Octuple(MIDITokenizer):
             elif bar_value > current_bar:
                 current_bar = bar_value
                 current_pos = -1
-                current_pitches = {p: [] for p in self.config.programs}
+                current_pitches.clear()
 
             # Position
             if pos_value < current_pos:
                 has_error = True
             elif pos_value > current_pos:
                 current_pos = pos_value
-                current_pitches = {p: [] for p in self.config.programs}
+                current_pitches.clear()
 
             # Pitch
-            if pitch_value in current_pitches[current_program]:
+            pitch_key = (current_program, pitch_value)
+            if pitch_key in current_pitches:
                 has_error = True
             else:
-                current_pitches[current_program].append(pitch_value)
+                current_pitches.add(pitch_key)
 
             if has_error:
                 err += 1
@@ -31,6 +31,9 @@ setup(
         "scipy",  # needed for miditoolkit
         "matplotlib",  # needed for miditoolkit
     ],
+    extras_require={
+        "numba": ["numba>=0.53"],  # compiles the decoding of CPWord
+    },
     classifiers=[
         "Intended Audience :: Developers",
         "Intended Audience :: Science/Research",
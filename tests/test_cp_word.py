@@ -0,0 +1,350 @@
+#!/usr/bin/python3 python
+
+"""CPWord test file
+CPWord decodes and analyzes its tokens with kernels compiled with numba when it is
+installed, and with Python / NumPy otherwise. Both must give the same results.
+"""
+
+from contextlib import contextmanager
+from copy import deepcopy
+from pathlib import Path
+from random import Random
+from typing import List
+
+import pytest
+
+import miditok
+from miditok.constants import CHORD_MAPS
+from miditok.tokenizations import cp_word
+from miditoolkit import Instrument, MidiFile, Note, TempoChange, TimeSignature
+
+TOKENIZER_PARAMS = [
+    {
+        "beat_res": {(0, 16): 8},
+        "use_chords": True,
+        "use_rests": True,
+        "use_tempos": True,
+        "use_time_signatures": True,
+        "use_programs": True,
+        "beat_res_rest": {(0, 2): 4, (2, 12): 2},
+        "nb_tempos": 32,
+        "tempo_range": (40, 250),
+        "chord_maps": CHORD_MAPS,
+        "chord_tokens_with_root_note": True,
+        "chord_unknown": (3, 6),
+        "one_token_stream_for_programs": True,
+    },
+    {
+        "beat_res": {(0, 16): 8},
+        "use_rests": True,
+        "use_tempos": True,
+        "use_programs": True,
+        "beat_res_rest": {(0, 2): 4, (2, 12): 2},
+        "one_token_stream_for_programs": False,
+    },
+    {"beat_res": {(0, 16): 8}},
+]
+MIDI_PATHS = (
+    sorted(Path("tests", "One_track_MIDIs").glob("*.mid"))[:3]
+    + sorted(Path("tests", "Multitrack_MIDIs").glob("*.mid"))[:3]
+)
+
+
+@contextmanager
+def numba_enabled(enabled: bool):
+    numba_available = cp_word._NUMBA_AVAILABLE
+    cp_word._NUMBA_AVAILABLE = enabled
+    try:
+        yield
+    finally:
+        cp_word._NUMBA_AVAILABLE = numba_available
+
+
+def perturb_ids(
+    tokenizer: miditok.CPWord, ids: List[List[int]], rng: Random
+) -> List[List[int]]:
+    r"""Randomly alters Pitch and Position values and the programs of notes, and swaps
+    or duplicates compound tokens, keeping their ids within the vocabularies.
+    """
+    ids = deepcopy(ids)
+    for token in ids:
+        if rng.random() < 0.1 and token[0] == tokenizer._family_note_id:
+            token[2] = rng.randrange(tokenizer._pitch_base_id, len(tokenizer.vocab[2]))
+        elif rng.random() < 0.1 and token[1] >= tokenizer._position_base_id:
+            token[1] = rng.randrange(
+                tokenizer._position_base_id, len(tokenizer.vocab[1])
+            )
+        elif (
+            rng.random() < 0.02
+            and tokenizer.config.use_programs
+            and token[0] == tokenizer._family_note_id
+        ):
+            token[tokenizer._program_slot] = tokenizer._ignore_row[
+                tokenizer._program_slot
+            ]
+    for i in range(len(ids) - 1):
+        if rng.random() < 0.08:
+            ids[i], ids[i + 1] = ids[i + 1], ids[i]
+        elif rng.random() < 0.08:
+            ids[i + 1] = list(ids[i])
+    return ids
+
+
+def midi_content(midi: MidiFile):
+    return (
+        [
+            (
+                track.program,
+                track.is_drum,
+                [(n.pitch, n.velocity, n.start, n.end) for n in track.notes],
+            )
+            for track in midi.instruments
+        ],
+        [(tempo.tempo, tempo.time) for tempo in midi.tempo_changes],
+        [(ts.numerator, ts.denominator, ts.time) for ts in midi.time_signature_changes],
+        midi.max_tick,
+    )
+
+
+def decode_and_check(
+    tokenizer: miditok.CPWord, sequences: List[List[List[int]]], midi: MidiFile
+):
+    r"""Returns the results of tokens_errors, tokens_errors_batch and tokens_to_midi."""
+    tok_sequences = [miditok.TokSequence(ids=ids) for ids in sequences]
+    errors = [tokenizer.tokens_errors(seq) for seq in tok_sequences]
+    errors_batch = tokenizer.tokens_errors_batch(tok_sequences)
+    # tokens_to_midi replaces the sequences of the list by their ids
+    if tokenizer.one_token_stream:
+        decoded = tokenizer.tokens_to_midi(
+            tok_sequences[0], time_division=midi.ticks_per_beat
+        )
+    else:
+        decoded = tokenizer.tokens_to_midi(
+            tok_sequences,
+            miditok.utils.get_midi_programs(midi),
+            time_division=midi.ticks_per_beat,
+        )
+    return errors, errors_batch, midi_content(decoded)
+
+
+def test_cp_word_numba_and_python_equal():
+    rng = Random(777)
+    for params in TOKENIZER_PARAMS:
+        tokenizers = {}
+        for numba in (True, False):
+            with numba_enabled(numba):
+                tokenizers[numba] = miditok.CPWord(miditok.TokenizerConfig(**params))
+
+        for midi_path in MIDI_PATHS:
+            midi = MidiFile(midi_path)
+            if not tokenizers[True].validate_midi_time_signatures(midi):
+                continue
+            tokens = tokenizers[True](midi)
+            if isinstance(tokens, miditok.TokSequence):
+                tokens = [tokens]
+            sequences = [seq.ids for seq in tokens]
+            perturbed = [
+                [perturb_ids(tokenizers[True], ids, rng) for ids in sequences]
+                for _ in range(3)
+            ]
+
+            for sequences_ in [sequences] + perturbed:
+                results = {}
+                for numba in (True, False):
+                    with numba_enabled(numba):
+                        results[numba] = decode_and_check(
+                            tokenizers[numba], sequences_, midi
+                        )
+                assert (
+                    results[True] == results[False]
+                ), f"numba and Python results differ for {midi_path.name} with {params}"
+
+
+def test_cp_word_edge_cases():
+    # Without tempos and time signatures, so that a rest can be the first token
+    config = miditok.TokenizerConfig(
+        beat_res={(0, 16): 8},
+        use_rests=True,
+        use_programs=True,
+        beat_res_rest={(0, 2): 4, (2, 12): 2},
+    )
+    for numba in (True, False):
+        with numba_enabled(numba):
+            tokenizer = miditok.CPWord(config)
+
+            # A rest as first token, the first note being played after 10 beats
+            midi = MidiFile(ticks_per_beat=384)
+            midi.tempo_changes = [TempoChange(120, 0)]
+            midi.time_signature_changes = [TimeSignature(4, 4, 0)]
+            midi.instruments.append(Instrument(0))
+            midi.instruments[0].notes = [
+                Note(90, 60, 384 * 10, 384 * 11),
+                Note(90, 62, 384 * 11, 384 * 12),
+            ]
+            tokens = tokenizer(midi)
+            assert tokens.tokens[0][-1].startswith("Rest_")
+            assert tokenizer.tokens_errors(tokens) == 0
+            decoded = tokenizer.tokens_to_midi(tokens, time_division=384)
+            assert [
+                (n.pitch, n.start, n.end) for n in decoded.instruments[0].notes
+            ] == [
+                (60, 384 * 10, 384 * 11),
+                (62, 384 * 11, 384 * 12),
+            ]
+
+            # A note with an Ignore_None program is an error
+            ids = deepcopy(tokens.ids)
+            note_idx = [token[0] for token in ids].index(tokenizer._family_note_id)
+            ids[note_idx][tokenizer._program_slot] = tokenizer.vocab[
+                tokenizer._program_slot
+            ]["Ignore_None"]
+            assert tokenizer.tokens_errors(miditok.TokSequence(ids=ids)) == 1 / len(ids)
+
+            # Empty sequences and sequences without notes
+            metric_ids = [
+                token for token in tokens.ids if token[0] != tokenizer._family_note_id
+            ]
+            assert tokenizer.tokens_errors(miditok.TokSequence(ids=[])) == 0
+            assert tokenizer.tokens_errors_batch(
+                [miditok.TokSequence(ids=[]), tokens, miditok.TokSequence(ids=ids)]
+            ) == [0, 0, 1 / len(ids)]
+            assert tokenizer.tokens_errors_batch([]) == []
+            for ids_ in ([], metric_ids):
+                decoded = tokenizer.tokens_to_midi(miditok.TokSequence(ids=ids_))
+                assert decoded.max_tick == 0
+                assert len(decoded.instruments) == 0
+
+            # Compound tokens of different lengths, or with unknown ids
+            with pytest.raises(ValueError):
+                tokenizer.tokens_errors(miditok.TokSequence(ids=[ids[0], ids[1][:-1]]))
+            with pytest.raises(ValueError):
+                tokenizer.tokens_errors_batch(
+                    [tokens, miditok.TokSequence(ids=[ids[0][:-1]])]
+                )
+            ids[0][2] = len(tokenizer.vocab[2])
+            with pytest.raises(KeyError):
+                tokenizer.tokens_errors(miditok.TokSequence(ids=ids))
+            with pytest.raises(KeyError):
+                tokenizer.tokens_to_midi(miditok.TokSequence(ids=ids))
+
+            # A Pitch added to the vocabulary after the creation of the tokenizer
+            tokenizer.add_to_vocab("Pitch_200", 2)
+            ids = deepcopy(tokens.ids)
+            ids[note_idx][2] = tokenizer.vocab[2]["Pitch_200"]
+            decoded = tokenizer.tokens_to_midi(
+                miditok.TokSequence(ids=ids), time_division=384
+            )
+            assert decoded.instruments[0].notes[0].pitch == 200
+
+            # Pitch_200 played twice at the same position is an error, Pitch_72 played by
+            # another program is not (200 = 128 + 72, the masks are wider than 128 pitches)
+            other_note = list(ids[note_idx])
+            other_note[2] = tokenizer.vocab[2]["Pitch_72"]
+            other_note[tokenizer._program_slot] = tokenizer.vocab[
+                tokenizer._program_slot
+            ]["Program_1"]
+            ids.insert(note_idx + 1, other_note)
+            assert tokenizer.tokens_errors(miditok.TokSequence(ids=ids)) == 0
+            ids.insert(note_idx + 1, list(ids[note_idx]))
+            assert tokenizer.tokens_errors(miditok.TokSequence(ids=ids)) == 1 / len(ids)
+
+
+def test_cp_word_tokens_errors():
+    tokenizers = [
+        miditok.CPWord(miditok.TokenizerConfig(beat_res={(0, 16): 8})),
+        miditok.CPWord(
+            miditok.TokenizerConfig(beat_res={(0, 16): 8}, use_programs=True)
+        ),
+    ]
+    for tokenizer in tokenizers:
+        velocity = list(tokenizer.vocab[3])[-1]
+        duration = list(tokenizer.vocab[4])[-1]
+        nb_additional = len(tokenizer.vocab) - 5
+
+        def metric(token: str) -> List[str]:
+            return ["Family_Metric", token] + ["Ignore_None"] * (3 + nb_additional)
+
+        def note(pitch: int, program: int = 0) -> List[str]:
+            token = ["Family_Note", "Ignore_None", f"Pitch_{pitch}", velocity, duration]
+            if tokenizer.config.use_programs:
+                token.append(f"Program_{program}")
+            return token
+
+        # Sequences and their error ratios, computed by hand
+        sequences = [
+            (
+                [metric("Bar_None"), metric("Position_0"), note(60), note(62)]
+                + [metric("Position_8"), note(60)],
+                0,
+            ),
+            # Pitch 60 played twice at position 0
+            (
+                [metric("Bar_None"), metric("Position_0"), note(60), note(60)]
+                + [metric("Position_8"), note(60)],
+                1 / 6,
+            ),
+            # Position 4 going back in time after position 8
+            (
+                [metric("Bar_None"), metric("Position_8"), note(60)]
+                + [metric("Position_4"), note(62), metric("Bar_None")]
+                + [metric("Position_0"), note(60)],
+                1 / 8,
+            ),
+            # Both
+            (
+                [metric("Bar_None"), metric("Position_0"), note(60), note(60)]
+                + [metric("Position_8"), note(62), metric("Position_4"), note(64)],
+                2 / 8,
+            ),
+        ]
+        if tokenizer.config.use_programs:
+            # The same pitch played by two programs
+            sequences.append(
+                (
+                    [metric("Bar_None"), metric("Position_0"), note(60, 0)]
+                    + [note(60, 1), note(60, 0)],
+                    1 / 5,
+                )
+            )
+
+        tok_sequences = []
+        for tokens, _ in sequences:
+            tok_sequences.append(miditok.TokSequence(tokens=tokens))
+            tokenizer.complete_sequence(tok_sequences[-1])
+        expected = [error for _, error in sequences]
+        for numba in (True, False):
+            with numba_enabled(numba):
+                errors = [tokenizer.tokens_errors(seq) for seq in tok_sequences]
+                assert errors == pytest.approx(expected)
+                errors = tokenizer.tokens_errors_batch(tok_sequences)
+                assert errors == pytest.approx(expected)
+
+
+def test_cp_word_events():
+    for params in TOKENIZER_PARAMS:
+        tokenizer = miditok.CPWord(miditok.TokenizerConfig(**params))
+        tokenizer_events = miditok.CPWord(
+            miditok.TokenizerConfig(create_events=True, **params)
+        )
+        for midi_path in MIDI_PATHS:
+            midi = MidiFile(midi_path)
+            if not tokenizer.validate_midi_time_signatures(midi):
+                continue
+            tokens, tokens_events = tokenizer(midi), tokenizer_events(midi)
+            if isinstance(tokens, miditok.TokSequence):
+                tokens, tokens_events = [tokens], [tokens_events]
+            for seq, seq_events in zip(tokens, tokens_events):
+                assert seq.events is None
+                assert seq_events.ids == seq.ids
+                assert [
+                    [str(event) for event in token] for token in seq_events.events
+                ] == seq.tokens
+                times = [token[0].time for token in seq_events.events]
+                assert times == sorted(times)
+
+
+if __name__ == "__main__":
+    test_cp_word_numba_and_python_equal()
+    test_cp_word_edge_cases()
+    test_cp_word_tokens_errors()
+    test_cp_word_events()